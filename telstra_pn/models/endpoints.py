@@ -1,4 +1,5 @@
 import enum
+from contextlib import closing
 from telstra_pn.models.tpn_model import (TPNModel, TPNListModel,
                                          TPNModelSubclassesMixin)
 from telstra_pn.exceptions import (TPNRefreshInconsistency)
@@ -46,10 +47,15 @@ class Endpoints(TPNListModel):
         }
 
     def _update_data(self, data: list) -> None:
-        self.data = {**self.data, 'list': self._extend_data(data, Endpoint)}
-
-        for port in self.data['list']:
-            self.additem(Endpoint(self, **port))
+        # endpoint objects are created as each detail response arrives,
+        # while the remaining detail requests are still in flight
+        details = []
+        with closing(self._iter_extend_data(data, Endpoint)) as ports:
+            for port in ports:
+                details.append(port)
+                self.additem(Endpoint(self, **port))
+
+        self.data = {**self.data, 'list': details}
 
     def display(self):
         return f'{len(self)} endpoints'
@@ -1,4 +1,5 @@
-from typing import Any, Union
+from typing import Any, Iterator, Union
+from contextlib import closing
 import inspect
 from telstra_pn import __flags__
 from telstra_pn.exceptions import (TPNDataError, TPNLogicalError,
@@ -340,13 +341,18 @@ class TPNListModel(TPNModel):
             yield self.all[i]
 
     def _extend_data(self, data: list, cls: object) -> list:
+        return list(self._iter_extend_data(data, cls))
+
+    def _iter_extend_data(self, data: list, cls: object) -> Iterator:
         if self.__dict__.get('api_session'):
             session = self.api_session
         else:
             session = self.session.api_session
 
-        urls = [{'path': cls.get_url_path(item)} for item in data]
-        return session.call_apis(urls)
+        urls = ({'path': cls.get_url_path(item)} for item in data)
+        with closing(session.iter_apis(urls)) as responses:
+            for (_, response) in responses:
+                yield response
 
 
 class TPNModelSubclassesMixin:
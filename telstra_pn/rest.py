@@ -1,75 +1,583 @@
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, Union
+import asyncio
+import collections
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
 import requests
+from requests.adapters import HTTPAdapter
 from requests_futures.sessions import FuturesSession
-from concurrent.futures import Future, as_completed
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from concurrent.futures import (Future, InvalidStateError, as_completed,
+                                wait, FIRST_COMPLETED)
 import datetime
 from telstra_pn import __flags__
 from telstra_pn.exceptions import TPNAPIUnavailable, TPNDataError
+from telstra_pn.statistics import CallStatistics
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
 
 default_endpoint = 'https://api.pn.telstra.com'
 stdargs = {'allow_redirects': False}
+methods = ('GET', 'POST', 'PUT', 'DELETE')
+undecoded = object()
 
 
-class ApiSession():
+class BaseApiSession():
     def __init__(self):
-        self.session = FuturesSession(max_workers=20)
         self.debug = __flags__.get('debug_api')
         self.auth = None
 
     def set_auth(self, auth):
         self.auth = auth
 
-    def call_api(self, **kwargs) -> Any:
-        try:
-            r = self._call_api(**kwargs).result()
-        except BaseException as exc:
-            raise TPNAPIUnavailable(exc) from None
+    def _prepare(self,
+                 path: str = None,
+                 method: str = 'GET',
+                 body: str = None,
+                 **kwargs) -> tuple:
+        headers = {}
+
+        if 'headers' in kwargs:
+            headers = {**(kwargs['headers'])}
+            del kwargs['headers']
+
+        if not kwargs.get('noauth') and self.auth is not None:
+            headers['authorization'] = self.auth
+
+        if 'noauth' in kwargs:
+            del kwargs['noauth']
+
+        method = method.upper()
 
         if self.debug:
-            print(f'<-- {r.status_code}')
-            print(f'<-- {r.text}')
+            print(f'{method} {default_endpoint}{path} [{headers}]')
+
+        if method not in methods:
+            raise TPNAPIUnavailable(
+                f'method {method} not implemented') from None
+
+        return (method, f'{default_endpoint}{path}', body, headers, kwargs)
+
+
+class PoolStatistics():
+    '''
+    `PoolStatistics` counts connection pool activity for an `ApiSession`.
+
+    Attributes:
+    - `created` requests which required a new connection to be opened.
+    - `reused` requests which were sent over an existing (warm) connection.
+    - `discarded` connections which were closed after use because the pool
+      was already full.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def add(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded
+            }
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.as_dict()})'
+
+
+def _counting_pool(pool_class: type, statistics: PoolStatistics) -> type:
+    class CountingConnectionPool(pool_class):
+        def _make_request(self, conn, *args, **kwargs):
+            if getattr(conn, 'sock', None) is None:
+                statistics.add('created')
+            else:
+                statistics.add('reused')
+            return super()._make_request(conn, *args, **kwargs)
+
+        def _put_conn(self, conn):
+            if conn is not None and self.pool is not None and self.pool.full():
+                statistics.add('discarded')
+            return super()._put_conn(conn)
+
+    return CountingConnectionPool
+
+
+class PoolStatisticsAdapter(HTTPAdapter):
+    '''
+    `PoolStatisticsAdapter` is an `HTTPAdapter` which records connection
+    pool activity in `statistics` (a `PoolStatistics`).
+    '''
+    def __init__(self, statistics: PoolStatistics, **kwargs):
+        self.statistics = statistics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool(HTTPConnectionPool, self.statistics),
+            'https': _counting_pool(HTTPSConnectionPool, self.statistics)
+        }
+
+
+class RevalidationCache():
+    '''
+    `RevalidationCache` keeps the most recent successful GET response for
+    each URL which provided an `ETag` or `Last-Modified` validator.
+
+    `headers()` provides the `If-None-Match`/`If-Modified-Since` headers
+    for a subsequent request to the same URL, and `update()` substitutes
+    the cached response when the API replies `304 Not Modified`.
+
+    Attributes:
+    - `revalidated` the number of responses served from the cache.
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = {}
+        self.revalidated = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._responses = {}
+
+    def headers(self, url: str) -> dict:
+        cached = self._responses.get(url)
+        if cached is None:
+            return {}
+        headers = {}
+        if 'etag' in cached.headers:
+            headers['If-None-Match'] = cached.headers['etag']
+        if 'last-modified' in cached.headers:
+            headers['If-Modified-Since'] = cached.headers['last-modified']
+        return headers
+
+    def update(self, url: str, response: requests.Response
+               ) -> requests.Response:
+        if response.status_code == 304:
+            with self._lock:
+                cached = self._responses.get(url)
+                if cached is None:
+                    return response
+                for validator in ('etag', 'last-modified'):
+                    if validator in response.headers:
+                        cached.headers[validator] = (
+                            response.headers[validator])
+                self.revalidated += 1
+            return cached
+
+        if response.status_code == 200 and (
+                'etag' in response.headers
+                or 'last-modified' in response.headers):
+            # ensure the body is read before the response is shared
+            response.content
+            with self._lock:
+                self._responses[url] = response
+        return response
+
+
+class RetryPolicy():
+    '''
+    `RetryPolicy` describes how `ApiSession` retries a failed request.
+
+    A request using one of `methods` is re-issued (up to a total of
+    `attempts` attempts) if it fails with one of `exceptions` or returns
+    one of `statuses`. Before each retry, the worker waits for a random
+    period between zero and `backoff * 2 ** (attempt - 1)` seconds
+    (capped at `max_backoff`), or for the period given by the response's
+    `Retry-After` header. A `Retry-After` longer than `max_backoff` is
+    not waited for, and the response is returned as-is.
+
+    Only the failed request is retried, so a transient failure within a
+    batch of requests made by `call_apis()` costs a single extra request.
+    '''
+    def __init__(self,
+                 attempts: int = 3,
+                 backoff: float = 0.2,
+                 max_backoff: float = 10.0,
+                 methods: tuple = ('GET',),
+                 statuses: tuple = (429, 502, 503, 504),
+                 exceptions: tuple = (requests.exceptions.ConnectionError,
+                                      requests.exceptions.Timeout)):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.methods = methods
+        self.statuses = statuses
+        self.exceptions = exceptions
+
+    def delay(self, attempt: int, response: requests.Response = None
+              ) -> Union[float, None]:
+        '''
+        `delay()` returns the number of seconds to wait before retrying
+        after the failure of attempt number `attempt` (starting from 1),
+        or `None` if the request should not be retried.
+        '''
+        if attempt >= self.attempts:
+            return None
+
+        if response is not None and 'retry-after' in response.headers:
+            retry_after = self._retry_after(response.headers['retry-after'])
+            if retry_after is not None:
+                if retry_after > self.max_backoff:
+                    return None
+                return retry_after
+
+        ceiling = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)  # nosec
+
+    @staticmethod
+    def _retry_after(value: str) -> Union[float, None]:
         try:
-            r.raise_for_status()
-        except requests.exceptions.HTTPError as exc:
-            raise TPNDataError(exc) from None
-        return(r.json())
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+
+class ConcurrencyLimiter():
+    '''
+    `ConcurrencyLimiter` adapts the number of requests an `ApiSession` has
+    in flight using additive-increase/multiplicative-decrease (AIMD).
+
+    Each successful request increases `limit` by `increase / limit` (so
+    by roughly `increase` per `limit` requests), up to `maximum`. A
+    response with one of `statuses`, a timeout, or a latency above
+    `max_latency` seconds (or above `latency_tolerance` times the
+    lowest recently observed latency, ignoring latencies below
+    `latency_floor` seconds) multiplies `limit` by `decrease`,
+    down to `minimum`. Only one decrease is applied per congestion event:
+    requests which started before the most recent decrease do not
+    decrease the limit again.
+
+    Worker threads wait in `acquire()` while `limit` requests are in
+    flight, so the effective concurrency is also bounded by the
+    `ApiSession` `max_workers`.
+
+    Attributes:
+    - `limit` the current concurrency limit.
+    - `in_flight` the number of requests currently in flight.
+    - `history` the most recent limit adjustments, as
+      `(timestamp, limit, reason)` tuples.
+    '''
+    def __init__(self,
+                 initial: int = 20,
+                 minimum: int = 1,
+                 maximum: int = 20,
+                 increase: float = 1.0,
+                 decrease: float = 0.5,
+                 latency_tolerance: float = 3.0,
+                 latency_floor: float = 0.1,
+                 max_latency: float = None,
+                 statuses: tuple = (429, 503),
+                 history: int = 100):
+        self._condition = threading.Condition()
+        self._limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.latency_floor = latency_floor
+        self.max_latency = max_latency
+        self.statuses = statuses
+        self.in_flight = 0
+        self.history = collections.deque(maxlen=history)
+        self._latencies = collections.deque(maxlen=50)
+        self._last_decrease = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self.minimum, int(self._limit))
+
+    def acquire(self) -> float:
+        '''
+        `acquire()` waits until fewer than `limit` requests are in flight.
+
+        Returns: the start time of the request, to be passed to `release()`.
+        '''
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self,
+                started: float,
+                status_code: int = None,
+                timed_out: bool = False) -> None:
+        '''
+        `release()` records the outcome of a request started (by
+        `acquire()`) at `started`, and adjusts `limit` accordingly.
+        '''
+        now = time.monotonic()
+        latency = now - started
+        with self._condition:
+            self.in_flight -= 1
+            reason = self._congestion(latency, status_code, timed_out)
+            self._latencies.append(latency)
+
+            previous = self.limit
+            if reason is None:
+                self._limit = min(float(self.maximum),
+                                  self._limit + self.increase / self._limit)
+                reason = 'increase'
+            elif started >= self._last_decrease:
+                self._limit = max(float(self.minimum),
+                                  self._limit * self.decrease)
+                self._last_decrease = now
+
+            if self.limit != previous:
+                self.history.append((time.time(), self.limit, reason))
+            self._condition.notify_all()
+
+    def _congestion(self,
+                    latency: float,
+                    status_code: int,
+                    timed_out: bool) -> Union[str, None]:
+        if timed_out:
+            return 'timeout'
+        if status_code in self.statuses:
+            return f'status {status_code}'
+        if self.max_latency is not None and latency > self.max_latency:
+            return 'latency'
+        if (len(self._latencies) >= 10 and latency > max(
+                self.latency_floor,
+                self.latency_tolerance * min(self._latencies))):
+            return 'latency'
+        return None
+
+    def statistics(self) -> dict:
+        with self._condition:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'history': list(self.history)
+            }
+
+
+class ApiCallError():
+    '''
+    `ApiCallError` records a single failed request from a batch of
+    requests made via `ApiSession.call_apis(errors='collect')`.
+
+    Attributes:
+    - `request` the request (as passed to `call_api()`) which failed.
+    - `error` the `TPNAPIUnavailable` or `TPNDataError` exception raised.
+    - `status_code` the HTTP status code, or `None` if the API could not
+      be reached.
+    '''
+    def __init__(self, request: dict, error: Exception):
+        self.request = request
+        self.error = error
+        self.status_code = getattr(error, 'status_code', None)
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(path={self.request.get("path")}, '
+                f'status_code={self.status_code}, error={self.error!r})')
+
+
+class ApiResults(list):
+    '''
+    `ApiResults` is the list of successful responses returned by
+    `ApiSession.call_apis()`, with any per-request failures listed
+    (as `ApiCallError` objects) in `errors`.
+    '''
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.errors = []
+
+
+class ApiSession(BaseApiSession):
+    '''
+    `ApiSession` issues requests to the TPN API from a pool of
+    `max_workers` threads.
+
+    Connection pool options:
+    - `pool_connections` the number of hosts for which a pool of
+      connections is kept.
+    - `pool_maxsize` the number of connections kept per host (default:
+      `max_workers`, so that every worker can use a warm connection).
+    - `pool_block` when `True`, workers wait for a free connection rather
+      than opening (and later discarding) additional connections.
+    - `keep_alive` when `False`, connections are closed after each request.
+
+    Connection pool activity is available via `pool_statistics`.
+
+    When `revalidate` is `True`, GET responses carrying an `ETag` or
+    `Last-Modified` header are kept in `revalidation_cache`, and repeated
+    requests for the same URL are made conditional, so that an unchanged
+    resource costs a `304 Not Modified` rather than the full payload.
+
+    Failed requests are retried according to `retry` (a `RetryPolicy`).
+    By default, GETs are retried up to three times on connection failures
+    and on 429, 502, 503 and 504 responses. `retry=None` disables retries.
+
+    If a `limiter` (a `ConcurrencyLimiter`) is provided, the number of
+    requests in flight is adjusted to the observed latency and throttling
+    responses of the TPN API, within the bounds set by `max_workers`.
+
+    When `coalesce` is `True`, a GET for a URL (with the same headers)
+    which is already in flight is not sent again, but waits for the
+    response to the original request. Each caller receives its own
+    `Future`, and the shared request is only cancelled once every caller
+    waiting on it has cancelled. The number of coalesced requests is
+    counted in `coalesced`.
+
+    Every request sent (including each retry) is recorded in
+    `call_statistics` (a `CallStatistics`), grouped by path template.
+    `statistics()` summarises these along with the connection pool,
+    revalidation, coalescing and concurrency limiter statistics.
 
-    def call_apis(self, items: list) -> Any:
-        results = []
+    Response bodies are decoded in the worker threads. `json_decoder`
+    may be set to a faster decoder which accepts `bytes`
+    (e.g. `orjson.loads`) for large inventory payloads; by default,
+    responses are decoded by `requests`.
+    '''
+    def __init__(self,
+                 max_workers: int = 20,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = None,
+                 pool_block: bool = False,
+                 keep_alive: bool = True,
+                 revalidate: bool = True,
+                 retry: RetryPolicy = RetryPolicy(),
+                 limiter: ConcurrencyLimiter = None,
+                 coalesce: bool = True,
+                 json_decoder: Callable[[bytes], Any] = None):
+        super().__init__()
+        self.json_decoder = json_decoder
+        self.max_workers = max_workers
+        self.retry = retry
+        self.limiter = limiter
+        self.coalesce = coalesce
+        self.coalesced = 0
+        self.call_statistics = CallStatistics()
+        self._inflight = {}
+        self._inflight_lock = threading.RLock()
+        self.pool_statistics = PoolStatistics()
+        self.revalidation_cache = RevalidationCache() if revalidate else None
+        self.session = FuturesSession(max_workers=self.max_workers)
+
+        adapter = PoolStatisticsAdapter(
+            self.pool_statistics,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize or max_workers,
+            pool_block=pool_block)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def set_auth(self, auth):
+        # cached responses are specific to the credentials used
+        if self.revalidation_cache is not None:
+            self.revalidation_cache.clear()
+        super().set_auth(auth)
+
+    def statistics(self) -> dict:
+        '''
+        `statistics()` returns a summary of the activity of this session:
+        - `calls` per path template statistics (see `CallStatistics`).
+        - `pool` connection pool statistics (see `PoolStatistics`).
+        - `revalidated` the number of responses served from the
+          revalidation cache.
+        - `coalesced` the number of requests which were coalesced with
+          an identical request already in flight.
+        - `limiter` concurrency limiter statistics, if a limiter is used.
+        '''
+        stats = {
+            'calls': self.call_statistics.as_dict(),
+            'pool': self.pool_statistics.as_dict(),
+            'revalidated': (self.revalidation_cache.revalidated
+                            if self.revalidation_cache is not None else 0),
+            'coalesced': self.coalesced
+        }
+        if self.limiter is not None:
+            stats['limiter'] = self.limiter.statistics()
+        return stats
+
+    def call_api(self, **kwargs) -> Any:
+        return self._result(self._call_api(**kwargs))
+
+    def call_apis(self, items: list, errors: str = 'raise') -> ApiResults:
+        '''
+        `call_apis()` issues all requests in `items` concurrently.
+
+        `errors` selects the behaviour when a request fails:
+        - `'raise'` raises the first failure, leaving remaining requests
+          to complete in the background.
+        - `'cancel'` cancels all requests which have not yet started,
+          then raises the first failure.
+        - `'collect'` completes all requests and returns the successful
+          responses, with the failures available in `errors`
+          on the result.
+
+        Returns: `ApiResults` (a list of responses, in order of completion).
+
+        Raises:
+        - `TPNAPIUnavailable` or `TPNDataError` (as per `call_api()`)
+          unless `errors` is `'collect'`.
+        - `ValueError` if `errors` is not one of the above.
+        '''
+        if errors not in ('raise', 'cancel', 'collect'):
+            raise ValueError(f'call_apis: unknown errors mode {errors}')
+
+        results = ApiResults()
         futures = [
             {
                 'starttime': datetime.datetime.now(),
-                'future': self._call_api(**item)
+                'future': self._call_api(**item),
+                'item': item
             }
             for item in items]
+        requests_by_future = {f['future']: f['item'] for f in futures}
 
         seq = 0
         for future in as_completed([f['future'] for f in futures]):
+            future.endtime = datetime.datetime.now()
+            future.seq = seq
+            seq += 1
             try:
-                r = future.result()
-                future.endtime = datetime.datetime.now()
-                future.seq = seq
-                seq += 1
-            except BaseException as exc:
-                raise TPNAPIUnavailable(exc) from None
-
-            if self.debug:
-                print(f'<-- {r.status_code}')
-                print(f'<-- {r.text}')
-            try:
-                r.raise_for_status()
-            except requests.exceptions.HTTPError as exc:
-                raise TPNDataError(exc) from None
-            results.append(r.json())
+                results.append(self._result(future))
+            except (TPNAPIUnavailable, TPNDataError) as exc:
+                if errors == 'collect':
+                    results.errors.append(
+                        ApiCallError(requests_by_future[future], exc))
+                    continue
+                if errors == 'cancel':
+                    for f in futures:
+                        f['future'].cancel()
+                raise
 
         if self.debug:
             for call in sorted(futures, key=lambda x: x['starttime']):
+                if call['future'].exception() is not None:
+                    continue
                 total_elapsed = (call["future"].endtime - call["starttime"]
                                  ) / datetime.timedelta(microseconds=1)
-                query_time = (call["future"].result().elapsed /
+                query_time = (call["future"].result()[0].elapsed /
                               datetime.timedelta(microseconds=1))
                 print(
-                    f'{call["future"].result().request.url}, '
+                    f'{call["future"].result()[0].request.url}, '
                     f'{call["future"].seq}, '
                     f'{call["starttime"]}, '
                     f'{call["future"].endtime}, '
@@ -79,54 +587,319 @@ class ApiSession():
 
         return results
 
-    def _call_api(self,
-                  path: str = None,
-                  method: str = 'GET',
-                  body: str = None,
-                  **kwargs) -> Future:
+    def iter_apis(self, items: Iterable, window: int = None) -> Iterator:
+        '''
+        `iter_apis()` is a streaming alternative to `call_apis()`. At most
+        `window` requests (default: the number of worker threads) are in
+        flight at once, and further requests are only issued from `items`
+        as earlier ones complete.
 
-        headers = {}
+        Yields: `(item, result)` tuples in order of completion, where `item`
+        is the request (as passed to `call_api()`) and `result` is the
+        parsed response body.
 
-        if 'headers' in kwargs:
-            headers = {**(kwargs['headers'])}
-            del kwargs['headers']
+        Raises:
+        - `TPNAPIUnavailable` or `TPNDataError` (as per `call_api()`) when
+          the failed request is reached. Requests which have not yet
+          started are cancelled, as they are if the caller stops iterating
+          early (i.e. closes the generator), and those already in flight
+          are allowed to finish before the generator exits.
+        '''
+        if window is None:
+            window = self.max_workers
+        items = iter(items)
+        pending = {}
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        pending[self._call_api(**item)] = item
+                if not pending:
+                    return
+                (done, _) = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    yield (item, self._result(future))
+        finally:
+            for future in pending:
+                future.cancel()
+            wait(pending)
 
-        if not kwargs.get('noauth'):
-            headers['authorization'] = self.auth
+    def _result(self, future: Future) -> Any:
+        try:
+            (r, data) = future.result()
+        except BaseException as exc:
+            raise TPNAPIUnavailable(exc) from None
 
-        if 'noauth' in kwargs:
-            del kwargs['noauth']
+        if self.debug:
+            print(f'<-- {r.status_code}')
+            print(f'<-- {r.text}')
+        try:
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as exc:
+            raise TPNDataError(exc) from None
+        if data is undecoded:
+            return r.json()
+        return data
 
-        method = method.upper()
+    # runs in a worker thread
+    def _decode(self, r: requests.Response) -> tuple:
+        '''
+        `_decode()` parses the body of a successful response, so that
+        decoding overlaps with other requests' network I/O rather than
+        happening on the thread collecting the results. Each caller gets
+        its own decoded body, even when the response itself is shared
+        (by request coalescing or the revalidation cache).
 
-        if self.debug:
-            print(f'{method} {default_endpoint}{path} [{headers}]')
+        Returns: `(response, data)`, where `data` is `undecoded` if the
+        response was unsuccessful or could not be decoded (in which case
+        any error is raised when the caller collects the result).
+        '''
+        if not 200 <= r.status_code < 300:
+            return (r, undecoded)
+        try:
+            if self.json_decoder is None:
+                return (r, r.json())
+            return (r, self.json_decoder(r.content))
+        except Exception:
+            return (r, undecoded)
 
-        if method == 'GET':
-            return self.session.get(
-                f'{default_endpoint}{path}',
-                headers=headers,
-                **stdargs, **kwargs)
+    def _call_api(self, **kwargs) -> Future:
+        (method, url, body, headers, kwargs) = self._prepare(**kwargs)
 
-        if method == 'POST':
-            return self.session.post(
-                f'{default_endpoint}{path}',
-                data=body,
-                headers=headers,
-                **stdargs, **kwargs)
+        if method != 'GET' or not self.coalesce or kwargs:
+            return self.session.executor.submit(
+                lambda: self._decode(
+                    self._send(method, url, body, headers, kwargs)))
 
-        if method == 'DELETE':
-            return self.session.delete(
-                f'{default_endpoint}{path}',
-                data=body,
-                headers=headers,
-                **stdargs, **kwargs)
+        key = (url, tuple(sorted(headers.items())))
+        with self._inflight_lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                shared = Future()
+                shared.waiters = 0
+                self._inflight[key] = shared
+                shared.add_done_callback(
+                    lambda f: self._inflight_done(key, f))
+                owner = True
+            else:
+                owner = False
+                self.coalesced += 1
+                if self.debug:
+                    print(f'coalesced {method} {url}')
+            shared.waiters += 1
+            # the waiter is attached before the request is submitted, so
+            # that its response is decoded in the worker thread
+            waiter = self._waiter(shared)
 
-        if method == 'PUT':
-            return self.session.put(
-                f'{default_endpoint}{path}',
-                data=body,
+        if owner:
+            self.session.executor.submit(
+                self._send_shared, shared, method, url, body, headers, kwargs)
+        return waiter
+
+    # runs in a worker thread
+    def _send_shared(self, shared: Future, *args) -> None:
+        if not shared.set_running_or_notify_cancel():
+            return
+        try:
+            r = self._send(*args)
+        except BaseException as exc:
+            shared.set_exception(exc)
+        else:
+            shared.set_result(r)
+
+    def _inflight_done(self, key: tuple, future: Future) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _waiter(self, shared: Future) -> Future:
+        waiter = Future()
+
+        def waiter_done(f):
+            if f.cancelled():
+                with self._inflight_lock:
+                    shared.waiters -= 1
+                    if shared.waiters == 0:
+                        shared.cancel()
+
+        def shared_done(f):
+            if f.cancelled():
+                waiter.cancel()
+                return
+            try:
+                if f.exception() is not None:
+                    waiter.set_exception(f.exception())
+                else:
+                    waiter.set_result(self._decode(f.result()))
+            except InvalidStateError:
+                # this waiter has already been cancelled
+                pass
+
+        waiter.add_done_callback(waiter_done)
+        shared.add_done_callback(shared_done)
+        return waiter
+
+    # runs in a worker thread
+    def _send(self,
+              method: str,
+              url: str,
+              body: str,
+              headers: dict,
+              kwargs: dict) -> requests.Response:
+        revalidate = method == 'GET' and self.revalidation_cache is not None
+        if revalidate:
+            headers = {**self.revalidation_cache.headers(url), **headers}
+
+        retry = self.retry
+        if retry is not None and method not in retry.methods:
+            retry = None
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                r = self._request(method, url, body, headers, kwargs)
+            except BaseException as exc:
+                if retry is None or not isinstance(exc, retry.exceptions):
+                    raise
+                delay = retry.delay(attempt)
+                if delay is None:
+                    raise
+            else:
+                if retry is None or r.status_code not in retry.statuses:
+                    break
+                delay = retry.delay(attempt, r)
+                if delay is None:
+                    break
+
+            if self.debug:
+                print(f'retrying {method} {url} in {delay:.2f}s')
+            time.sleep(delay)
+
+        if revalidate:
+            r = self.revalidation_cache.update(url, r)
+        return r
+
+    # runs in a worker thread
+    def _request(self,
+                 method: str,
+                 url: str,
+                 body: str,
+                 headers: dict,
+                 kwargs: dict) -> requests.Response:
+        if self.limiter is not None:
+            started = self.limiter.acquire()
+        else:
+            started = time.monotonic()
+        try:
+            r = requests.Session.request(
+                self.session, method, url,
+                data=None if method == 'GET' else body,
                 headers=headers,
                 **stdargs, **kwargs)
+        except BaseException as exc:
+            self.call_statistics.record(
+                method, url, time.monotonic() - started)
+            if self.limiter is not None:
+                self.limiter.release(
+                    started,
+                    timed_out=isinstance(exc, requests.exceptions.Timeout))
+            raise
+        self.call_statistics.record(
+            method, url, time.monotonic() - started,
+            status_code=r.status_code, size=len(r.content or b''))
+        if self.limiter is not None:
+            self.limiter.release(started, status_code=r.status_code)
+        return r
+
+
+class AsyncApiSession(BaseApiSession):
+    '''
+    `AsyncApiSession` is an asyncio equivalent of `ApiSession`. Requests
+    are issued from the running event loop via `aiohttp` rather than
+    from a pool of worker threads, so the number of requests in flight
+    is bounded only by `limit` (the size of the connection pool).
+
+    `call_api()` and `call_apis()` are coroutines, but otherwise accept
+    the same arguments and raise the same exceptions as their
+    `ApiSession` counterparts.
+
+    The underlying `aiohttp.ClientSession` is created on first use and
+    should be released with `close()` (or by using the session as an
+    `async with` context manager).
+
+    Raises:
+    - `ImportError` if `aiohttp` is not installed.
+    '''
+    def __init__(self, limit: int = 100):
+        if aiohttp is None:
+            raise ImportError('AsyncApiSession requires aiohttp') from None
+        super().__init__()
+        self.limit = limit
+        self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit))
+        return self.session
+
+    async def call_api(self, **kwargs) -> Any:
+        r = await self._call_api(**kwargs)
+
+        if self.debug:
+            print(f'<-- {r.status_code}')
+            print(f'<-- {r.text}')
+        try:
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as exc:
+            raise TPNDataError(exc) from None
+        return r.json()
+
+    async def call_apis(self, items: list) -> list:
+        return list(await asyncio.gather(
+            *[self.call_api(**item) for item in items]))
+
+    async def _call_api(self, **kwargs) -> requests.Response:
+        (method, url, body, headers, kwargs) = self._prepare(**kwargs)
+
+        try:
+            async with self._get_session().request(
+                    method, url,
+                    data=body,
+                    headers=headers,
+                    **stdargs, **kwargs) as response:
+                content = await response.read()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as exc:
+            raise TPNAPIUnavailable(exc) from None
 
-        raise TPNAPIUnavailable(f'method {method} not implemented') from None
+        # present the response as a `requests.Response` so that status
+        # handling, error messages and JSON decoding are identical to
+        # `ApiSession`
+        r = requests.Response()
+        r.status_code = response.status
+        r.reason = response.reason
+        r.url = str(response.url)
+        r.headers = requests.structures.CaseInsensitiveDict(response.headers)
+        r.encoding = response.charset
+        r.request = requests.Request(method, url, headers=headers).prepare()
+        r._content = content
+        return r
@@ -0,0 +1,141 @@
+from typing import Union
+import bisect
+import functools
+import re
+import threading
+from urllib.parse import urlsplit
+
+# upper bounds (in seconds) of the latency histogram buckets
+latency_buckets = (
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+    1.0, 2.0, 5.0, 10.0, 20.0, 60.0, float('inf')
+)
+
+path_patterns = [
+    (re.compile(r'^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-'
+                r'[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'), '{uuid}'),
+    # P2P link ids (and contract ids, which are "<linkid>.<seqno>")
+    (re.compile(r'^[0-9a-fA-F]{16}(\.[0-9]+)?$'), '{id}'),
+    # links-stats timestamps, e.g. 2021-09-26-00:00:00
+    (re.compile(r'^[0-9]{4}-[0-9]{2}-[0-9]{2}-[0-9:]+$'), '{timestamp}'),
+    (re.compile(r'^[0-9]+$'), '{n}'),
+]
+
+
+@functools.lru_cache(maxsize=4096)
+def path_template(url: str) -> str:
+    '''
+    `path_template()` returns the path of `url` with identifiers (UUIDs,
+    link and contract ids, timestamps and numbers) replaced by
+    placeholders, e.g. `/eis/1.0.0/endpoint/endpointuuid/{uuid}`.
+    '''
+    segments = urlsplit(url).path.split('/')
+    for (i, segment) in enumerate(segments):
+        for (pattern, placeholder) in path_patterns:
+            if pattern.match(segment):
+                segments[i] = placeholder
+                break
+    return '/'.join(segments)
+
+
+class LatencyHistogram():
+    '''
+    `LatencyHistogram` counts latencies into the fixed buckets in
+    `latency_buckets`, so that recording is cheap and memory use is
+    constant. Percentiles are reported as the upper bound of the bucket
+    containing the percentile (or the maximum latency seen, if lower).
+    '''
+    def __init__(self):
+        self.counts = [0] * len(latency_buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latency: float) -> None:
+        self.counts[bisect.bisect_left(latency_buckets, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    def percentile(self, percentile: float) -> Union[float, None]:
+        if self.count == 0:
+            return None
+        target = self.count * percentile / 100
+        cumulative = 0
+        for (bound, count) in zip(latency_buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+
+class CallStatistics():
+    '''
+    `CallStatistics` accumulates statistics for calls to the TPN API,
+    grouped by HTTP method and path template (see `path_template()`).
+
+    For each template, `as_dict()` reports:
+    - `count` the number of requests sent.
+    - `errors` the number of requests which failed (no response, or a
+      response with a status code of 400 or above).
+    - `bytes` the total size of the response bodies.
+    - `latency` the mean, 50th, 90th and 99th percentile and maximum
+      latency (in seconds).
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+
+    def record(self,
+               method: str,
+               url: str,
+               latency: float,
+               status_code: int = None,
+               size: int = 0) -> None:
+        key = (method, path_template(url))
+        with self._lock:
+            stats = self._templates.get(key)
+            if stats is None:
+                stats = {
+                    'count': 0,
+                    'errors': 0,
+                    'bytes': 0,
+                    'latency': LatencyHistogram()
+                }
+                self._templates[key] = stats
+            stats['count'] += 1
+            if status_code is None or status_code >= 400:
+                stats['errors'] += 1
+            stats['bytes'] += size
+            stats['latency'].record(latency)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._templates = {}
+
+    def as_dict(self) -> dict:
+        '''
+        Returns: a dict keyed by `'<METHOD> <template>'`, sorted by total
+        latency (slowest overall first).
+        '''
+        with self._lock:
+            items = sorted(self._templates.items(),
+                           key=lambda i: i[1]['latency'].total,
+                           reverse=True)
+            return {
+                f'{method} {template}': {
+                    **stats,
+                    'latency': stats['latency'].as_dict()
+                }
+                for ((method, template), stats) in items
+            }
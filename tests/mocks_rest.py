@@ -27,9 +27,49 @@ mock_rest_responses = {
                 'testpatch': True
             }
         },
+        ('etag', 'GET'): {
+            'json': {
+                'testget': True
+            },
+            'headers': {
+                'ETag': '"v1"'
+            }
+        },
+        ('lastmodified', 'GET'): {
+            'json': {
+                'testget': True
+            },
+            'headers': {
+                'Last-Modified': 'Mon, 18 Oct 2021 00:00:00 GMT'
+            }
+        },
+        ('304', 'GET'): {
+            'status_code': 304,
+            'headers': {
+                'ETag': '"v2"'
+            }
+        },
+        ('invalidjson', 'GET'): {
+            'text': 'not json'
+        },
         ('500', 'GET'): {
             'status_code': 500
         },
+        ('503', 'GET'): {
+            'status_code': 503
+        },
+        ('429', 'GET'): {
+            'status_code': 429,
+            'headers': {
+                'Retry-After': '2'
+            }
+        },
+        ('429_long', 'GET'): {
+            'status_code': 429,
+            'headers': {
+                'Retry-After': '3600'
+            }
+        },
         ('500', 'POST'): {
             'status_code': 500
         },
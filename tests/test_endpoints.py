@@ -178,6 +178,14 @@ class TestEndpointsBehaviour(testtools.TestCase):
         self.assertEqual(self.api_mock.call_count, 13,
                          mock_history(self.api_mock))
 
+    def test_endpoints_statistics(self):
+        calls = self.tpns.api_session.statistics()['calls']
+        self.assertEqual(
+            calls['GET /eis/1.0.0/endpoint/endpointuuid/{uuid}']['count'], 3)
+        self.assertEqual(
+            calls['GET /1.0.0/inventory/endpoints/customeruuid/{uuid}']
+            ['count'], 1)
+
     def test_endpoints_display(self):
         self.assertEqual(str(self.eps), '3 endpoints')
 
@@ -1,4 +1,14 @@
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import requests
 import testtools
+from aiohttp import web
+from aiohttp import test_utils
 from requests_mock.contrib import fixture
 
 import telstra_pn
@@ -7,6 +17,11 @@ from telstra_pn.exceptions import TPNDataError, TPNAPIUnavailable
 import tests.mocks
 
 
+def distinct_paths(n: int) -> list:
+    # distinct URLs, so that concurrent requests are not coalesced
+    return [{'path': f'/testpath?item={i}'} for i in range(n)]
+
+
 class TestRest(testtools.TestCase):
     def setUp(self):
         super(TestRest, self).setUp()
@@ -215,3 +230,593 @@ class TestRest(testtools.TestCase):
                 path='/testpath',
                 body=''
             )
+
+    def test_get_revalidate_etag(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'etag'), ('testpath', 'GET', '304')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r1 = tpns.call_api(path='/testpath')
+        r2 = tpns.call_api(path='/testpath')
+        r3 = tpns.call_api(path='/testpath')
+
+        self.assertEqual(r1, self.mr['/testpath'][('etag', 'GET')]['json'])
+        self.assertEqual(r2, r1)
+        self.assertEqual(r3, r1)
+        self.assertIsNot(r2, r1)
+        history = self.api_mock.request_history
+        self.assertNotIn('If-None-Match', history[0].headers)
+        self.assertEqual(history[1].headers['If-None-Match'], '"v1"')
+        self.assertEqual(history[2].headers['If-None-Match'], '"v2"')
+        self.assertEqual(tpns.revalidation_cache.revalidated, 2)
+
+    def test_get_revalidate_last_modified(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'lastmodified'), ('testpath', 'GET', '304')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r = tpns.call_apis([{'path': '/testpath'}])
+        r = tpns.call_apis([{'path': '/testpath'}])
+
+        self.assertEqual(r, [self.mr['/testpath'][('default', 'GET')]['json']])
+        self.assertEqual(
+            self.api_mock.request_history[1].headers['If-Modified-Since'],
+            'Mon, 18 Oct 2021 00:00:00 GMT')
+
+    def test_get_revalidate_disabled(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'etag')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession(revalidate=False)
+        tpns.call_api(path='/testpath')
+        tpns.call_api(path='/testpath')
+
+        self.assertIsNone(tpns.revalidation_cache)
+        self.assertNotIn('If-None-Match',
+                         self.api_mock.request_history[1].headers)
+
+    def test_get_revalidate_set_auth(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'etag')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        tpns.call_api(path='/testpath')
+        self.assertEqual(len(tpns.revalidation_cache), 1)
+        tpns.set_auth('Bearer other')
+        self.assertEqual(len(tpns.revalidation_cache), 0)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_get_retry(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '503'), ('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r = tpns.call_api(path='/testpath')
+
+        self.assertEqual(r, self.mr['/testpath'][('default', 'GET')]['json'])
+        self.assertEqual(self.api_mock.call_count, 2)
+        self.assertEqual(sleep_mock.call_count, 1)
+        self.assertLessEqual(sleep_mock.call_args[0][0], 0.2)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_get_retry_exhausted(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '503')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession(
+            retry=telstra_pn.rest.RetryPolicy(attempts=4))
+        with self.assertRaisesRegex(TPNDataError, 'Server Error:.*'):
+            tpns.call_api(path='/testpath')
+        self.assertEqual(self.api_mock.call_count, 4)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_get_retry_timeout(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'timeout'), ('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r = tpns.call_api(path='/testpath')
+
+        self.assertEqual(r, self.mr['/testpath'][('default', 'GET')]['json'])
+        self.assertEqual(self.api_mock.call_count, 2)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_get_retry_after(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '429'), ('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        tpns.call_api(path='/testpath')
+
+        sleep_mock.assert_called_once_with(2.0)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_get_retry_after_too_long(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '429_long'), ('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        with self.assertRaises(TPNDataError) as cm:
+            tpns.call_api(path='/testpath')
+        self.assertEqual(cm.exception.status_code, 429)
+        self.assertEqual(sleep_mock.call_count, 0)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_get_retry_disabled(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '503'), ('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession(retry=None)
+        with self.assertRaises(TPNDataError):
+            tpns.call_api(path='/testpath')
+        self.assertEqual(self.api_mock.call_count, 1)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_post_not_retried(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'POST', 'timeout'), ('testpath', 'POST')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        with self.assertRaises(TPNAPIUnavailable):
+            tpns.call_api(method='POST', path='/testpath', body='')
+        self.assertEqual(self.api_mock.call_count, 1)
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_call_apis_retry_failed_only(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',), ('testpath',), ('testpath', 'GET', '503'),
+             ('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r = tpns.call_apis(distinct_paths(3))
+
+        self.assertEqual(len(r), 3)
+        self.assertEqual(self.api_mock.call_count, 4)
+
+    def test_retry_policy_delay(self):
+        policy = telstra_pn.rest.RetryPolicy(
+            attempts=10, backoff=1, max_backoff=5)
+        for attempt in range(1, 10):
+            self.assertLessEqual(policy.delay(attempt),
+                                 min(5, 2 ** (attempt - 1)))
+        self.assertIsNone(policy.delay(10))
+
+    def test_json_decoder(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',)]
+        )
+        threads = []
+
+        def decoder(content):
+            threads.append(threading.current_thread())
+            return {'decoded': json.loads(content)}
+
+        tpns = telstra_pn.rest.ApiSession(json_decoder=decoder)
+        r = tpns.call_apis(distinct_paths(2))
+
+        self.assertEqual(r, [
+            {'decoded': self.mr['/testpath'][('default', 'GET')]['json']}
+        ] * 2)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_json_decoder_error(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'invalidjson')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        with self.assertRaises(requests.exceptions.JSONDecodeError):
+            tpns.call_api(path='/testpath')
+
+    def test_iter_apis(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',)]
+        )
+        pulled = []
+
+        def items():
+            for i in range(5):
+                pulled.append(i)
+                yield {'path': f'/testpath?item={i}'}
+
+        tpns = telstra_pn.rest.ApiSession()
+        it = tpns.iter_apis(items(), window=2)
+        (item, r) = next(it)
+        self.assertEqual(len(pulled), 2)
+        self.assertIn(item, [{'path': '/testpath?item=0'},
+                             {'path': '/testpath?item=1'}])
+        self.assertEqual(r, self.mr['/testpath'][('default', 'GET')]['json'])
+        self.assertEqual(len(list(it)), 4)
+        self.assertEqual(len(pulled), 5)
+        self.assertEqual(self.api_mock.call_count, 5)
+
+    def test_iter_apis_500(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '500')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        with self.assertRaisesRegex(TPNDataError, 'Server Error:.*'):
+            list(tpns.iter_apis(distinct_paths(3)))
+
+    def test_call_apis_collect(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',), ('testpath', 'GET', '500')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r = tpns.call_apis(distinct_paths(3), errors='collect')
+        self.assertEqual(r, [self.mr['/testpath'][('default', 'GET')]['json']])
+        self.assertEqual(len(r.errors), 2)
+        self.assertRegex(r.errors[0].request['path'], '/testpath.*')
+        self.assertEqual(r.errors[0].status_code, 500)
+        self.assertIsInstance(r.errors[0].error, TPNDataError)
+
+    def test_call_apis_collect_timeout(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', 'timeout')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        r = tpns.call_apis([{'path': '/testpath'}], errors='collect')
+        self.assertEqual(r, [])
+        self.assertIsNone(r.errors[0].status_code)
+        self.assertIsInstance(r.errors[0].error, TPNAPIUnavailable)
+
+    def test_call_apis_cancel(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '500')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        tpns.session.executor = ThreadPoolExecutor(max_workers=1)
+        with self.assertRaisesRegex(TPNDataError, 'Server Error:.*'):
+            tpns.call_apis(distinct_paths(20), errors='cancel')
+        tpns.session.executor.shutdown(wait=True)
+        self.assertLess(self.api_mock.call_count, 20)
+
+    def test_call_apis_invalid_errors(self):
+        tpns = telstra_pn.rest.ApiSession()
+        with self.assertRaisesRegex(ValueError, 'unknown errors mode'):
+            tpns.call_apis([], errors='ignore')
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_call_apis_limiter(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath', 'GET', '503'), ('testpath',)]
+        )
+
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=8, maximum=8)
+        tpns = telstra_pn.rest.ApiSession(limiter=limiter)
+        tpns.call_apis(distinct_paths(4))
+
+        self.assertEqual(limiter.in_flight, 0)
+        self.assertLess(limiter.limit, 8)
+        self.assertEqual(limiter.history[0][1:], (4, 'status 503'))
+
+    @patch('telstra_pn.rest.time.sleep')
+    def test_statistics(self, sleep_mock):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',), ('testpath', 'GET', '503'), ('testpath',),
+             ('/testpath', 'POST')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        tpns.call_apis(distinct_paths(2))
+        tpns.call_api(method='POST', path='/testpath', body='')
+
+        stats = tpns.statistics()
+        self.assertEqual(stats['calls']['GET /testpath']['count'], 3)
+        self.assertEqual(stats['calls']['GET /testpath']['errors'], 1)
+        self.assertEqual(stats['calls']['GET /testpath']['bytes'],
+                         2 * len('{"testget": true}'))
+        self.assertEqual(stats['calls']['POST /testpath']['count'], 1)
+        self.assertEqual(stats['coalesced'], 0)
+        self.assertEqual(stats['revalidated'], 0)
+        self.assertIn('created', stats['pool'])
+        self.assertNotIn('limiter', stats)
+
+    def test_get_coalesce(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        release = threading.Event()
+        send = tpns._send
+
+        def blocking_send(*args):
+            release.wait(1)
+            return send(*args)
+
+        with patch.object(tpns, '_send', side_effect=blocking_send):
+            futures = [tpns._call_api(path='/testpath') for i in range(3)]
+            other = tpns._call_api(path='/testpath?other')
+            release.set()
+            results = [tpns._result(f) for f in futures]
+
+        self.assertEqual(results, [
+            self.mr['/testpath'][('default', 'GET')]['json']] * 3)
+        self.assertIsNot(results[0], results[1])
+        tpns._result(other)
+        self.assertEqual(self.api_mock.call_count, 2)
+        self.assertEqual(tpns.coalesced, 2)
+        self.assertEqual(tpns._inflight, {})
+
+        # once complete, a request is no longer shared
+        tpns.call_api(path='/testpath')
+        self.assertEqual(self.api_mock.call_count, 3)
+
+    def test_get_coalesce_cancel(self):
+        tpns = telstra_pn.rest.ApiSession(max_workers=1)
+        release = threading.Event()
+        tpns.session.executor.submit(release.wait, 1)
+
+        first = tpns._call_api(path='/testpath')
+        second = tpns._call_api(path='/testpath')
+        shared = list(tpns._inflight.values())[0]
+        self.assertTrue(first.cancel())
+        self.assertFalse(shared.cancelled())
+        self.assertTrue(second.cancel())
+        self.assertTrue(shared.cancelled())
+        release.set()
+        self.assertEqual(self.api_mock.call_count, 0)
+
+    def test_post_not_coalesced(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('/testpath', 'POST')]
+        )
+
+        tpns = telstra_pn.rest.ApiSession()
+        futures = [tpns._call_api(path='/testpath', method='POST')
+                   for i in range(3)]
+        [tpns._result(f) for f in futures]
+        self.assertEqual(self.api_mock.call_count, 3)
+        self.assertEqual(tpns.coalesced, 0)
+
+    def test_get_coalesce_disabled(self):
+        tests.mocks.setup_mocks(
+            self.api_mock,
+            [('testpath',)]
+        )
+
+        tpns = telstra_pn.rest.ApiSession(coalesce=False)
+        tpns.call_apis([{'path': '/testpath'}] * 3)
+        self.assertEqual(self.api_mock.call_count, 3)
+
+
+class TestConcurrencyLimiter(unittest.TestCase):
+    def test_increase(self):
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=2, maximum=4)
+        for i in range(20):
+            limiter.release(limiter.acquire(), status_code=200)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual([h[1] for h in limiter.history], [3, 4])
+
+    def test_decrease_once_per_event(self):
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=16, maximum=16)
+        started = [limiter.acquire() for i in range(4)]
+        for s in started:
+            limiter.release(s, status_code=429)
+        self.assertEqual(limiter.limit, 8)
+        limiter.release(limiter.acquire(), status_code=429)
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.statistics()['history'][-1][1:],
+                         (4, 'status 429'))
+
+    def test_decrease_minimum(self):
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=2, minimum=1)
+        for i in range(3):
+            limiter.release(limiter.acquire(), timed_out=True)
+        self.assertEqual(limiter.limit, 1)
+        self.assertEqual(limiter.history[-1][2], 'timeout')
+
+    def test_decrease_latency(self):
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=10,
+                                                     max_latency=1)
+        limiter.release(limiter.acquire() - 2, status_code=200)
+        self.assertEqual(limiter.limit, 5)
+        self.assertEqual(limiter.history[-1][2], 'latency')
+
+    def test_decrease_relative_latency(self):
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=10,
+                                                     maximum=10)
+        for i in range(10):
+            limiter.release(limiter.acquire() - 0.1, status_code=200)
+        self.assertEqual(limiter.limit, 10)
+        limiter.release(limiter.acquire() - 1, status_code=200)
+        self.assertEqual(limiter.limit, 5)
+
+    def test_acquire_waits_for_limit(self):
+        limiter = telstra_pn.rest.ConcurrencyLimiter(initial=1)
+        started = limiter.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            limiter.acquire()
+            acquired.set()
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.assertFalse(acquired.wait(0.1))
+        limiter.release(started, status_code=200)
+        self.assertTrue(acquired.wait(1))
+        self.assertEqual(limiter.in_flight, 1)
+
+
+class MockHTTPRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    delay = 0
+
+    def do_GET(self):
+        sleep(self.delay)
+        body = b'{"testget": true}'
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRestPool(unittest.TestCase):
+    def setUp(self):
+        telstra_pn.__flags__['debug_api'] = False
+        MockHTTPRequestHandler.delay = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0),
+                                          MockHTTPRequestHandler)
+        threading.Thread(target=self.server.serve_forever,
+                         kwargs={'poll_interval': 0.01},
+                         daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        patcher = patch('telstra_pn.rest.default_endpoint',
+                        f'http://127.0.0.1:{self.server.server_port}')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pool_reuse(self):
+        tpns = telstra_pn.rest.ApiSession()
+        for i in range(5):
+            tpns.call_api(path='/testpath')
+        self.assertEqual(tpns.pool_statistics.as_dict(),
+                         {'created': 1, 'reused': 4, 'discarded': 0})
+
+    def test_pool_no_keep_alive(self):
+        tpns = telstra_pn.rest.ApiSession(keep_alive=False)
+        for i in range(3):
+            tpns.call_api(path='/testpath')
+        self.assertEqual(tpns.pool_statistics.created, 3)
+        self.assertEqual(tpns.pool_statistics.reused, 0)
+
+    def test_pool_discard(self):
+        MockHTTPRequestHandler.delay = 0.1
+        tpns = telstra_pn.rest.ApiSession(max_workers=4, pool_maxsize=1)
+        tpns.call_apis(distinct_paths(4))
+        self.assertEqual(tpns.pool_statistics.created, 4)
+        self.assertEqual(tpns.pool_statistics.discarded, 3)
+
+    def test_pool_block(self):
+        MockHTTPRequestHandler.delay = 0.05
+        tpns = telstra_pn.rest.ApiSession(max_workers=4, pool_maxsize=1,
+                                          pool_block=True)
+        tpns.call_apis(distinct_paths(4))
+        self.assertEqual(tpns.pool_statistics.as_dict(),
+                         {'created': 1, 'reused': 3, 'discarded': 0})
+
+
+class TestAsyncRest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        telstra_pn.__flags__['debug_api'] = True
+        self.mr = tests.mocks.mock_responses
+        self.requests = []
+
+        async def handler(request):
+            self.requests.append(request)
+            variant = request.query.get('variant', 'default')
+            mock = self.mr['/testpath'][(variant, request.method)]
+            return web.json_response(mock.get('json', {}),
+                                     status=mock.get('status_code', 200))
+
+        app = web.Application()
+        app.router.add_route('*', '/testpath', handler)
+        self.server = test_utils.TestServer(app)
+        await self.server.start_server()
+        endpoint = str(self.server.make_url('')).rstrip('/')
+        patcher = patch('telstra_pn.rest.default_endpoint', endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.tpns = telstra_pn.rest.AsyncApiSession()
+        self.tpns.set_auth('Bearer token')
+
+    async def asyncTearDown(self):
+        await self.tpns.close()
+        await self.server.close()
+
+    async def test_get_success(self):
+        r = await self.tpns.call_api(path='/testpath')
+
+        self.assertEqual(r, self.mr['/testpath'][('default', 'GET')]['json'])
+        self.assertEqual(self.requests[0].headers['authorization'],
+                         'Bearer token')
+
+    async def test_post_noauth(self):
+        r = await self.tpns.call_api(
+            method='post',
+            path='/testpath',
+            noauth=True,
+            body='a=b',
+            headers={'content-type': 'application/x-www-form-urlencoded'}
+        )
+
+        self.assertEqual(r, self.mr['/testpath'][('default', 'POST')]['json'])
+        self.assertNotIn('authorization', self.requests[0].headers)
+        self.assertEqual(self.requests[0].headers['content-type'],
+                         'application/x-www-form-urlencoded')
+
+    async def test_get_500(self):
+        with self.assertRaisesRegex(TPNDataError, 'Server Error:.*') as cm:
+            await self.tpns.call_api(path='/testpath?variant=500')
+        self.assertEqual(cm.exception.status_code, 500)
+
+    async def test_get_unavailable(self):
+        await self.server.close()
+        with self.assertRaises(TPNAPIUnavailable):
+            await self.tpns.call_api(path='/testpath')
+
+    async def test_invalid_method(self):
+        with self.assertRaisesRegex(TPNAPIUnavailable,
+                                    'method PATCH not implemented'):
+            await self.tpns.call_api(method='PATCH', path='/testpath')
+
+    async def test_call_apis(self):
+        r = await self.tpns.call_apis(
+            [{'path': '/testpath'}, {'path': '/testpath', 'method': 'PUT'}])
+
+        self.assertEqual(r, [
+            self.mr['/testpath'][('default', 'GET')]['json'],
+            self.mr['/testpath'][('default', 'PUT')]['json']
+        ])
+
+    async def test_call_apis_500(self):
+        with self.assertRaisesRegex(TPNDataError, 'Server Error:.*'):
+            await self.tpns.call_apis(
+                [{'path': '/testpath'}, {'path': '/testpath?variant=500'}])
@@ -0,0 +1,77 @@
+import unittest
+
+from telstra_pn.statistics import (path_template, LatencyHistogram,
+                                   CallStatistics)
+import tests.mocks
+
+
+class TestPathTemplate(unittest.TestCase):
+    def test_uuid(self):
+        self.assertEqual(
+            path_template('https://api.pn.telstra.com/eis/1.0.0/endpoint/'
+                          f'endpointuuid/{tests.mocks.MockEndpoint1UUID}'),
+            '/eis/1.0.0/endpoint/endpointuuid/{uuid}')
+
+    def test_link_and_contract(self):
+        self.assertEqual(
+            path_template(f'/1.0.0/inventory/links/{tests.mocks.MockLink1ID}'
+                          f'/contract/{tests.mocks.MockLink1ID}.12'),
+            '/1.0.0/inventory/links/{id}/contract/{id}')
+
+    def test_timestamps(self):
+        self.assertEqual(
+            path_template('/1.0.0/inventory/links-stats/flow/'
+                          f'{tests.mocks.MockLink1ID}/2021-09-26-00:00:00/'
+                          '2021-09-27-00:00:00'),
+            '/1.0.0/inventory/links-stats/flow/{id}/{timestamp}/{timestamp}')
+
+    def test_query_and_version(self):
+        self.assertEqual(path_template('/eis/1.0.0/switchporttype?x=1'),
+                         '/eis/1.0.0/switchporttype')
+        self.assertEqual(path_template('/lis/1.0.0/link/12345'),
+                         '/lis/1.0.0/link/{n}')
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_empty(self):
+        h = LatencyHistogram()
+        self.assertIsNone(h.percentile(50))
+        self.assertIsNone(h.as_dict()['mean'])
+
+    def test_percentiles(self):
+        h = LatencyHistogram()
+        for i in range(90):
+            h.record(0.015)
+        for i in range(9):
+            h.record(0.3)
+        h.record(3)
+        self.assertEqual(h.percentile(50), 0.02)
+        self.assertEqual(h.percentile(90), 0.02)
+        self.assertEqual(h.percentile(99), 0.5)
+        self.assertEqual(h.percentile(100), 3)
+        self.assertEqual(h.as_dict()['max'], 3)
+        self.assertAlmostEqual(h.as_dict()['mean'], (1.35 + 2.7 + 3) / 100)
+
+
+class TestCallStatistics(unittest.TestCase):
+    def test_record(self):
+        s = CallStatistics()
+        s.record('GET', f'/1.0.0/inventory/links/{tests.mocks.MockLink1ID}',
+                 0.1, status_code=200, size=100)
+        s.record('GET', f'/1.0.0/inventory/links/{tests.mocks.MockLink2ID}',
+                 0.3, status_code=500, size=10)
+        s.record('GET', '/1.0.0/inventory/datacenters', 0.05)
+        stats = s.as_dict()
+        self.assertEqual(list(stats.keys()), [
+            'GET /1.0.0/inventory/links/{id}',
+            'GET /1.0.0/inventory/datacenters'])
+        links = stats['GET /1.0.0/inventory/links/{id}']
+        self.assertEqual(links['count'], 2)
+        self.assertEqual(links['errors'], 1)
+        self.assertEqual(links['bytes'], 110)
+        self.assertEqual(links['latency']['max'], 0.3)
+        self.assertEqual(
+            stats['GET /1.0.0/inventory/datacenters']['errors'], 1)
+
+        s.reset()
+        self.assertEqual(s.as_dict(), {})